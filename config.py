@@ -13,7 +13,7 @@ Docs:
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional, Dict, Any
 
 
@@ -72,6 +72,12 @@ class TypecastTTSDefaults:
     # Seed for reproducibility (optional)
     seed: Optional[int] = 42
 
+    # Derived: file extension for audio_format (e.g. ".mp3"); computed once, not an input.
+    ext: str = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "ext", "." + self.audio_format.lower().strip("."))
+
 
 DEFAULTS = TypecastTTSDefaults()
 
@@ -100,8 +106,29 @@ def get_typecast_client(api_key: Optional[str] = None):
 
 TYPECAST_API_BASE_URL = "https://api.typecast.ai"
 TYPECAST_TTS_ENDPOINT = "/v1/text-to-speech"
+# Chunked streaming variant (used for --stream-preview); falls back to the endpoint above.
+TYPECAST_TTS_STREAM_ENDPOINT = "/v1/text-to-speech/stream"
+# Bulk submission (--batch-size): JSON array of payloads (+ clip_id) in, JSON array of
+# {clip_id, audio_data (base64)} out. Not available on every account/API version;
+# callers fall back to per-clip requests when it answers 404/405.
+TYPECAST_TTS_BATCH_ENDPOINT = "/v1/text-to-speech/batch"
 TYPECAST_API_KEY_HEADER = "X-API-KEY"
 
+# The REST endpoint answers with the raw audio binary (no JSON/base64 envelope).
+AUDIO_MIME_TYPES = {
+    "mp3": "audio/mpeg",
+    "wav": "audio/wav",
+}
+
+# Concurrent request limit of your Typecast plan (default for --concurrency).
+# Requests beyond it are answered with 429 too_many_concurrent_requests.
+TYPECAST_PLAN_CONCURRENCY = 4
+
+
+def audio_mime_type(audio_format: str) -> str:
+    """Accept header value for an output.audio_format ("mp3" -> "audio/mpeg")."""
+    return AUDIO_MIME_TYPES.get(audio_format.lower().strip("."), "application/octet-stream")
+
 
 def tts_request_payload(
     *,
@@ -18,80 +18,33 @@ Usage examples:
 
   # Force overwrite
   python generate_voice_assets_sample.py --force
+
+  # Up to 8 requests in flight
+  python generate_voice_assets_sample.py --concurrency 8
+
+  # Listen while each clip streams in (needs ffplay from ffmpeg)
+  python generate_voice_assets_sample.py --n-color 3 --stream-preview --force
 """
 
 from __future__ import annotations
 
 import argparse
+import asyncio
+import logging
 import random
 import sys
-import time
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, List, Tuple
 
 import config
+import tts_common
 
-try:
-    import yaml  # PyYAML
-except Exception as e:  # pragma: no cover
-    raise RuntimeError(
-        "PyYAML is required. Install: pip install pyyaml\n"
-        f"Import error: {e}"
-    )
-
-from typecast.models import TTSRequest, Output, Prompt  # type: ignore
+log = logging.getLogger("tts")
 
 
 def ensure_dir(p: Path) -> None:
     p.mkdir(parents=True, exist_ok=True)
 
-def write_bytes_atomic(path: Path, data: bytes) -> None:
-    tmp = path.with_suffix(path.suffix + ".tmp")
-    tmp.write_bytes(data)
-    tmp.replace(path)
-
-def iter_items(section: Any) -> List[Tuple[str, str]]:
-    if section is None:
-        return []
-    if isinstance(section, list):
-        out: List[Tuple[str, str]] = []
-        for it in section:
-            if not isinstance(it, dict) or "id" not in it or "text" not in it:
-                raise ValueError(f"Invalid item: {it}")
-            out.append((str(it["id"]), str(it["text"])))
-        return out
-    raise ValueError(f"Unsupported YAML section type: {type(section)}")
-
-def tts_one(cli, *, text: str, d: config.TypecastTTSDefaults) -> bytes:
-    req = TTSRequest(
-        text=text,
-        model=d.model,
-        voice_id=d.voice_id,
-        output=Output(
-            audio_format=d.audio_format,
-            volume=d.volume,
-            audio_pitch=d.audio_pitch,
-            audio_tempo=d.audio_tempo,
-        ),
-        prompt=Prompt(
-            emotion_preset=d.emotion_preset,
-            emotion_intensity=d.emotion_intensity,
-        ),
-        language=d.language,
-        seed=d.seed,
-    )
-    resp = cli.text_to_speech(req)
-    return resp.audio_data
-
-
-def sample(items: List[Tuple[str, str]], n: int, rng: random.Random) -> List[Tuple[str, str]]:
-    if n <= 0 or not items:
-        return []
-    if n >= len(items):
-        return items
-    return rng.sample(items, n)
-
-
 def main() -> int:
     ap = argparse.ArgumentParser(description="Generate a small subset of Typecast TTS assets")
     ap.add_argument("--yaml", dest="yaml_path", default="content_sets.yaml")
@@ -106,11 +59,17 @@ def main() -> int:
     ap.add_argument("--n-completion-not-enough", type=int, default=3)
     ap.add_argument("--n-completion-enough", type=int, default=3)
 
-    ap.add_argument("--sleep", type=float, default=0.25)
+    ap.add_argument("--concurrency", type=int, default=config.TYPECAST_PLAN_CONCURRENCY)
     ap.add_argument("--force", action="store_true")
+    ap.add_argument("--cache-dir", default=".tts_cache")
+    ap.add_argument("--no-cache", action="store_true")
     ap.add_argument("--dry-run", action="store_true")
+    ap.add_argument("--stream-preview", action="store_true",
+                    help="Play each clip as it streams in (sequential, uncached; needs ffplay)")
     args = ap.parse_args()
 
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+
     yaml_path = Path(args.yaml_path).expanduser().resolve()
     out_dir = Path(args.out_dir).expanduser().resolve()
 
@@ -118,23 +77,22 @@ def main() -> int:
         print(f"[ERR] YAML not found: {yaml_path}", file=sys.stderr)
         return 2
 
-    data: Dict[str, Any] = yaml.safe_load(yaml_path.read_text(encoding="utf-8"))
+    data: Dict[str, Any] = tts_common.load_yaml(yaml_path)
     root = data.get("lulu_reaction_voice") or {}
     vars_section = root.get("variables") or {}
     completion = root.get("completion") or {}
 
     rng = random.Random(args.seed)
 
-    prefixes = sample(iter_items(root.get("prefixes")), args.n_prefix, rng)
-    suffixes = sample(iter_items(root.get("suffixes")), args.n_suffix, rng)
-    colors = sample(iter_items(vars_section.get("colors")), args.n_color, rng)
-    tools = sample(iter_items(vars_section.get("tools")), args.n_tool, rng)
-    micros = sample(iter_items(root.get("micro_reactions")), args.n_micro, rng)
-    comp_ne = sample(iter_items(completion.get("not_enough")), args.n_completion_not_enough, rng)
-    comp_ok = sample(iter_items(completion.get("enough")), args.n_completion_enough, rng)
+    prefixes = tts_common.reservoir_sample(root.get("prefixes"), args.n_prefix, rng)
+    suffixes = tts_common.reservoir_sample(root.get("suffixes"), args.n_suffix, rng)
+    colors = tts_common.reservoir_sample(vars_section.get("colors"), args.n_color, rng)
+    tools = tts_common.reservoir_sample(vars_section.get("tools"), args.n_tool, rng)
+    micros = tts_common.reservoir_sample(root.get("micro_reactions"), args.n_micro, rng)
+    comp_ne = tts_common.reservoir_sample(completion.get("not_enough"), args.n_completion_not_enough, rng)
+    comp_ok = tts_common.reservoir_sample(completion.get("enough"), args.n_completion_enough, rng)
 
     d = config.DEFAULTS
-    ext = "." + d.audio_format.lower().strip(".")
 
     # Plan: (subdir, id, text)
     plan: List[Tuple[Path, str, str]] = []
@@ -154,53 +112,63 @@ def main() -> int:
         plan.append((out_dir / "completion" / "enough", clip_id, text))
 
     if not plan:
-        print("[WARN] No items selected.")
+        log.warning("[WARN] No items selected.")
         return 0
 
-    # Create dirs
-    for subdir, _, _ in plan:
+    # Create dirs (once per distinct subdir, not per clip)
+    subdirs = {subdir for subdir, _, _ in plan}
+    for subdir in subdirs:
         ensure_dir(subdir)
 
-    # Init client
-    cli = None
+    # Existing files: one directory scan per subdir (skipped entirely with --force)
+    existing = tts_common.scan_existing(subdirs) if not args.force else {}
+    # Log prefixes resolved once per subdir, not per clip
+    rel_dirs = {subdir: subdir.relative_to(out_dir) for subdir in subdirs}
+
+    # Auth header (requires TYPECAST_API_KEY env)
+    headers: Dict[str, str] = {}
     if not args.dry_run:
-        cli = config.get_typecast_client()
+        headers = tts_common.request_headers(audio_format=d.audio_format)
 
-    print(f"[INFO] Generating sample assets (seed={args.seed})")
-    print(f"[INFO] Output: {out_dir}  format={d.audio_format}")
+    log.info("[INFO] Generating sample assets (seed=%s)", args.seed)
+    log.info("[INFO] Output: %s  format=%s", out_dir, d.audio_format)
+
+    # Payload template: built once, only "text" varies per clip
+    payload_tpl = config.tts_request_payload(text="")
 
     generated = 0
     skipped = 0
     failed = 0
+    jobs: List[tts_common.Job] = []
 
+    n_plan = len(plan)
     for i, (subdir, clip_id, text) in enumerate(plan, start=1):
-        out_path = subdir / f"{clip_id}{ext}"
-        if out_path.exists() and not args.force:
+        out_path = subdir / f"{clip_id}{d.ext}"
+        if out_path.name in existing.get(subdir, ()):
             skipped += 1
             continue
 
-        print(f"[{i:03d}/{len(plan):03d}] {out_path.relative_to(out_dir)}  <-  {text}")
+        log.info("[%03d/%03d] %s/%s  <-  %s", i, n_plan, rel_dirs[subdir], out_path.name, text)
 
         if args.dry_run:
             generated += 1
             continue
 
-        try:
-            audio = tts_one(cli, text=text, d=d)
-            write_bytes_atomic(out_path, audio)
-            generated += 1
-        except Exception as e:
-            failed += 1
-            print(f"[ERR] Failed {clip_id}: {e}", file=sys.stderr)
-
-        if args.sleep > 0:
-            time.sleep(args.sleep)
-
-    print("\n[SUMMARY]")
-    print(f"  generated: {generated}")
-    print(f"  skipped:   {skipped}")
-    print(f"  failed:    {failed}")
-    print(f"  out_dir:   {out_dir}")
+        jobs.append((clip_id, out_path, {**payload_tpl, "text": text}))
+
+    if jobs and args.stream_preview:
+        generated, failed = asyncio.run(tts_common.preview_all(jobs, headers=headers))
+    elif jobs:
+        generated, failed = asyncio.run(tts_common.generate_all(
+            jobs, headers=headers, concurrency=args.concurrency,
+            cache_dir=None if args.no_cache else Path(args.cache_dir).expanduser().resolve(),
+        ))
+
+    log.info("\n[SUMMARY]")
+    log.info("  generated: %d", generated)
+    log.info("  skipped:   %d", skipped)
+    log.info("  failed:    %d", failed)
+    log.info("  out_dir:   %s", out_dir)
 
     return 1 if failed else 0
 
@@ -0,0 +1,697 @@
+"""
+Shared TTS helpers for the LuLuco generator scripts.
+
+- Posts directly to the Typecast REST endpoint (config.TYPECAST_API_BASE_URL + TYPECAST_TTS_ENDPOINT)
+- Fans clips out over one shared aiohttp.ClientSession (pooled keep-alive
+  connections, cached DNS) through an asyncio.Queue drained by --concurrency workers
+- 429 handling: too_many_concurrent_requests is re-queued after a short jittered
+  pause (at most MAX_REQUEUES times), system_busy (or any other 429) backs off exponentially with jitter
+- Transient failures (5xx, connection errors, timeouts) are retried the same way;
+  a Retry-After header always wins; other 4xx fail immediately
+- Audio is streamed to a unique .tmp file in STREAM_CHUNK_SIZE chunks, fsynced and
+  renamed into place, so a clip never sits fully in memory and survives a crash
+- Identical requests (same text + voice/model/prompt/output) are synthesized once;
+  the other clips are hardlinked (or copied) from the first
+- Content-addressed cache (--cache-dir, default .tts_cache/<payload sha1><ext>)
+  so re-runs never pay for a request that was already synthesized
+- Optional bulk submission (--batch-size) to the batch endpoint, falling back to
+  per-clip requests when it is unavailable
+- Preview mode: plays clips through ffplay while they stream in (time-to-first-audio
+  = first chunk, not full synthesis)
+
+Docs:
+- REST API (TTS): https://typecast.ai/docs/api-reference/endpoint/text-to-speech/text-to-speech
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import email.utils
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import shutil
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import config
+
+try:
+    import yaml  # PyYAML
+except Exception as e:  # pragma: no cover
+    raise RuntimeError(
+        "PyYAML is required. Install: pip install pyyaml\n"
+        "(For the fast C loader, PyYAML must be built against libyaml: "
+        "apt install libyaml-dev / brew install libyaml before pip install.)\n"
+        f"Import error: {e}"
+    )
+
+try:
+    from yaml import CSafeLoader as SafeLoader  # libyaml (C) scanner
+except ImportError:  # pragma: no cover
+    from yaml import SafeLoader  # type: ignore
+
+try:
+    import aiohttp
+    import aiofiles
+except Exception as e:  # pragma: no cover
+    raise RuntimeError(
+        "aiohttp and aiofiles are required. Install: pip install aiohttp aiofiles\n"
+        f"Import error: {e}"
+    )
+
+
+log = logging.getLogger("tts")
+
+TTS_URL = config.TYPECAST_API_BASE_URL + config.TYPECAST_TTS_ENDPOINT
+TTS_STREAM_URL = config.TYPECAST_API_BASE_URL + config.TYPECAST_TTS_STREAM_ENDPOINT
+TTS_BATCH_URL = config.TYPECAST_API_BASE_URL + config.TYPECAST_TTS_BATCH_ENDPOINT
+
+# One planned request: (label for logs, output path, REST payload)
+Job = Tuple[str, Path, Dict[str, Any]]
+
+# Backoff for 429 system_busy / transient errors: min(2**attempt + jitter, BACKOFF_CAP)
+# seconds, unless the server sends Retry-After
+MAX_ATTEMPTS = 6
+BACKOFF_CAP = 30.0
+RETRY_AFTER_CAP = 120.0
+
+# 429 too_many_concurrent_requests (no Retry-After): wait for a slot to free up,
+# REQUEUE_DELAY..2*REQUEUE_DELAY seconds per try, then give up on the clip
+MAX_REQUEUES = 40
+REQUEUE_DELAY = 0.25
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Preview: small chunks so playback starts on the first bytes.
+# ffplay (from ffmpeg) decodes mp3/wav from stdin.
+PREVIEW_CHUNK_SIZE = 4096
+PREVIEW_PLAYER = ("ffplay", "-autoexit", "-nodisp", "-loglevel", "error", "-i", "-")
+# Output fields accepted by /v1/text-to-speech/stream (the SDK's OutputStream schema)
+STREAM_OUTPUT_FIELDS = frozenset(
+    ("remove_silence_ms", "audio_pitch", "audio_tempo", "audio_format", "target_lufs")
+)
+
+# Connection pool: keep idle TLS connections around between clips
+KEEPALIVE_TIMEOUT = 30.0
+DNS_CACHE_TTL = 300
+
+
+class RetryableError(Exception):
+    """A failure worth retrying; `retry_after` is the server's Retry-After in seconds, if any."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimited(RetryableError):
+    """Typecast answered 429. `concurrent` is True for too_many_concurrent_requests."""
+
+    def __init__(self, status: str, retry_after: Optional[float] = None):
+        super().__init__(f"HTTP 429: {status or 'rate limited'}", retry_after)
+        self.status = status
+        self.concurrent = status == "too_many_concurrent_requests"
+
+
+class ServerError(RetryableError):
+    """Typecast answered 5xx."""
+
+
+class BatchUnavailable(Exception):
+    """The batch endpoint is missing or rejects our requests (non-429 4xx, unexpected body)."""
+
+
+# ----------------------------
+# Helpers
+# ----------------------------
+
+def load_yaml(path: Path) -> Any:
+    """Parses a YAML file with the libyaml-backed loader, streaming from the open file (libyaml decodes UTF-8)."""
+    with open(path, "rb") as f:
+        return yaml.load(f, Loader=SafeLoader)
+
+
+def _validate_items(section: Any) -> List[Any]:
+    """Checks a YAML list of {id, text} items (raises on the first bad one)."""
+    if section is None:
+        return []
+    if not isinstance(section, list):
+        raise ValueError(f"Unsupported YAML section type: {type(section)}")
+    bad = next((it for it in section
+                if not (isinstance(it, dict) and "id" in it and "text" in it)), None)
+    if bad is not None:
+        raise ValueError(f"Invalid item: {bad}")
+    return section
+
+
+def iter_items(section: Any) -> List[Tuple[str, str]]:
+    """
+    Returns (id, text) pairs from a YAML list of {id, text} items.
+    Validates the whole section first, then converts it in one pass.
+    """
+    return [(str(it["id"]), str(it["text"])) for it in _validate_items(section)]
+
+
+def _open_unit(rng: random.Random) -> float:
+    """Uniform sample from the open interval (0, 1) (log-safe)."""
+    u = rng.random()
+    while u == 0.0:
+        u = rng.random()
+    return u
+
+
+def reservoir_sample(section: Any, n: int, rng: random.Random) -> List[Tuple[str, str]]:
+    """
+    Picks n (id, text) pairs from a YAML list with reservoir sampling (Algorithm L):
+    only the n kept items are converted, never the full list. Returns all items if n >= len.
+    """
+    items = _validate_items(section)
+    if n <= 0 or not items:
+        return []
+    if n >= len(items):
+        return [(str(it["id"]), str(it["text"])) for it in items]
+
+    reservoir = items[:n]
+    w = math.exp(math.log(_open_unit(rng)) / n)
+    i = n - 1
+    while True:
+        i += int(math.log(_open_unit(rng)) / math.log(1.0 - w)) + 1
+        if i >= len(items):
+            break
+        reservoir[rng.randrange(n)] = items[i]
+        w *= math.exp(math.log(_open_unit(rng)) / n)
+    return [(str(it["id"]), str(it["text"])) for it in reservoir]
+
+
+def scan_existing(dirs: Iterable[Path]) -> Dict[Path, FrozenSet[str]]:
+    """File names per directory, one os.scandir per dir (instead of a stat per clip)."""
+    existing: Dict[Path, FrozenSet[str]] = {}
+    for d in dirs:
+        try:
+            with os.scandir(d) as it:
+                existing[d] = frozenset(e.name for e in it)
+        except FileNotFoundError:
+            existing[d] = frozenset()
+    return existing
+
+
+def sha1_text(s: str) -> str:
+    return hashlib.sha1(s.encode("utf-8")).hexdigest()
+
+
+def payload_hash(payload: Dict[str, Any]) -> str:
+    """Cache key: sha1 of the canonical JSON payload (text, voice, model, prompt, output, ...)."""
+    return sha1_text(json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False))
+
+
+def unique_tmp(path: Path) -> Path:
+    """Per-writer temp name next to path; concurrent writers never share a .tmp file."""
+    return path.with_name(f".{path.name}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+
+
+def fsync_dir(path: Path) -> None:
+    """Flushes directory entries (renames/links) to disk; no-op where unsupported."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_bytes_atomic(path: Path, data: bytes) -> None:
+    """Writes data via a unique O_EXCL tmp file + fsync + rename."""
+    tmp = unique_tmp(path)
+    try:
+        fd = os.open(tmp, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def link_or_copy(src: Path, dst: Path) -> None:
+    """Hardlinks src to dst (copies across filesystems), replacing dst atomically."""
+    try:
+        if dst.samefile(src):
+            # rename() between two links to one inode is a no-op that would leave tmp behind.
+            return
+    except FileNotFoundError:
+        pass
+    tmp = unique_tmp(dst)
+    try:
+        try:
+            os.link(src, tmp)
+        except OSError:
+            shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def request_headers(api_key: Optional[str] = None,
+                    audio_format: str = config.DEFAULTS.audio_format) -> Dict[str, str]:
+    """
+    Returns the REST headers: auth + Accept for the raw audio binary.
+    If api_key is not provided, reads TYPECAST_API_KEY from env.
+    """
+    key = api_key or config.require_env(config.ENV_API_KEY)
+    return {
+        config.TYPECAST_API_KEY_HEADER: key,
+        "Accept": config.audio_mime_type(audio_format),
+    }
+
+
+# ----------------------------
+# Async TTS
+# ----------------------------
+
+def make_session(concurrency: int) -> aiohttp.ClientSession:
+    """
+    One pooled session per run: up to `concurrency` keep-alive connections to the API host,
+    so each TLS handshake / DNS lookup is paid once per connection, not once per clip.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=concurrency,
+        limit_per_host=concurrency,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=DNS_CACHE_TTL,
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+
+async def _rate_limit_status(r: aiohttp.ClientResponse) -> str:
+    """Extracts detail.status from a 429 body (e.g. system_busy); '' if absent."""
+    try:
+        body = await r.json(content_type=None)
+    except Exception:
+        return ""
+    detail = body.get("detail") if isinstance(body, dict) else None
+    if isinstance(detail, dict):
+        return str(detail.get("status") or "")
+    return ""
+
+
+def _retry_after(r: aiohttp.ClientResponse) -> Optional[float]:
+    """Parses Retry-After (delta-seconds or HTTP date) into seconds; None if absent/invalid."""
+    value = r.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Seconds to wait before retry number attempt+1."""
+    if retry_after is not None:
+        return min(retry_after, RETRY_AFTER_CAP)
+    return min(2 ** attempt + random.random(), BACKOFF_CAP)
+
+
+async def _check_audio_response(r: aiohttp.ClientResponse) -> None:
+    """Raises RateLimited / ServerError / RuntimeError unless r is a 2xx raw-audio response."""
+    if r.status == 429:
+        raise RateLimited(await _rate_limit_status(r), _retry_after(r))
+    if r.status >= 500:
+        detail = await r.text()
+        raise ServerError(f"HTTP {r.status}: {detail[:200]}", _retry_after(r))
+    if r.status >= 400:
+        detail = await r.text()
+        raise RuntimeError(f"HTTP {r.status}: {detail[:200]}")
+    if r.content_type == "application/json":
+        # We only handle raw audio; never write a JSON envelope into an audio file.
+        detail = await r.text()
+        raise RuntimeError(f"Expected audio, got JSON: {detail[:200]}")
+
+
+async def stream_tts_to_file(session: aiohttp.ClientSession, sem: asyncio.Semaphore,
+                             payload: Dict[str, Any], headers: Dict[str, str],
+                             out_path: Path) -> None:
+    """Streams the binary TTS response into out_path (via a unique .tmp file + fsync + rename)."""
+    tmp = unique_tmp(out_path)
+    async with sem:
+        async with session.post(TTS_URL, json=payload, headers=headers) as r:
+            await _check_audio_response(r)
+            try:
+                # "xb" = O_CREAT | O_EXCL | O_WRONLY
+                async with aiofiles.open(tmp, "xb") as f:
+                    async for chunk in r.content.iter_chunked(STREAM_CHUNK_SIZE):
+                        await f.write(chunk)
+                    await f.flush()
+                    await asyncio.to_thread(os.fsync, f.fileno())
+            except BaseException:
+                tmp.unlink(missing_ok=True)
+                raise
+    os.replace(tmp, out_path)
+
+
+async def preview_one(session: aiohttp.ClientSession, payload: Dict[str, Any],
+                      headers: Dict[str, str], out_path: Path) -> None:
+    """
+    Plays one clip while it downloads (chunks piped into PREVIEW_PLAYER) and saves it to out_path.
+    Uses the streaming endpoint; falls back to the regular one if it is unavailable (404/405).
+    """
+    # The streaming endpoint validates output against OutputStream (extra="forbid", no
+    # "volume"): send only the fields it accepts.
+    stream_payload = {**payload, "output": {k: v for k, v in (payload.get("output") or {}).items()
+                                            if k in STREAM_OUTPUT_FIELDS}}
+    player = await asyncio.create_subprocess_exec(
+        *PREVIEW_PLAYER, stdin=asyncio.subprocess.PIPE,
+    )
+    assert player.stdin is not None
+    tmp = unique_tmp(out_path)
+    try:
+        r = await session.post(TTS_STREAM_URL, json=stream_payload, headers=headers)
+        if r.status in (404, 405):
+            r.release()
+            r = await session.post(TTS_URL, json=payload, headers=headers)
+        async with r:
+            await _check_audio_response(r)
+            async with aiofiles.open(tmp, "xb") as f:
+                async for chunk in r.content.iter_chunked(PREVIEW_CHUNK_SIZE):
+                    player.stdin.write(chunk)
+                    await player.stdin.drain()
+                    await f.write(chunk)
+                await f.flush()
+                await asyncio.to_thread(os.fsync, f.fileno())
+        os.replace(tmp, out_path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        player.kill()
+        raise
+    finally:
+        if not player.stdin.is_closing():
+            player.stdin.close()
+        await player.wait()
+
+
+async def preview_all(jobs: List[Job], *, headers: Dict[str, str]) -> Tuple[int, int]:
+    """
+    Plays jobs one after another as they stream in (no cache, no concurrency: it's for listening).
+    Returns (generated, failed).
+    """
+    if shutil.which(PREVIEW_PLAYER[0]) is None:
+        raise RuntimeError(
+            f"--stream-preview needs '{PREVIEW_PLAYER[0]}' on PATH. Install ffmpeg "
+            "(apt install ffmpeg / brew install ffmpeg)."
+        )
+    generated = 0
+    failed = 0
+    async with make_session(1) as session:
+        for label, out_path, payload in jobs:
+            log.info("[PLAY] %s", label)
+            try:
+                await preview_one(session, payload, headers, out_path)
+                generated += 1
+            except Exception as e:
+                failed += 1
+                print(f"[ERR] Failed {label}: {e}", file=sys.stderr)
+    return generated, failed
+
+
+async def post_batch(session: aiohttp.ClientSession, items: List[Tuple[str, Dict[str, Any]]],
+                     headers: Dict[str, str]) -> Dict[str, bytes]:
+    """
+    Submits [(clip_id, payload), ...] in one request; returns {clip_id: audio bytes}.
+    Raises BatchUnavailable when the endpoint rejects the request (any 4xx except 429)
+    or answers with something other than a list of {clip_id, audio_data}.
+    """
+    body = [{"clip_id": clip_id, **payload} for clip_id, payload in items]
+    batch_headers = {**headers, "Accept": "application/json"}
+    async with session.post(TTS_BATCH_URL, json=body, headers=batch_headers) as r:
+        if r.status == 429:
+            raise RateLimited(await _rate_limit_status(r), _retry_after(r))
+        if 400 <= r.status < 500:
+            detail = await r.text()
+            raise BatchUnavailable(f"HTTP {r.status}: {detail[:200]}")
+        if r.status >= 500:
+            detail = await r.text()
+            raise RuntimeError(f"HTTP {r.status}: {detail[:200]}")
+        try:
+            results = await r.json(content_type=None)
+        except ValueError as e:
+            raise BatchUnavailable(f"non-JSON response: {e}") from e
+    try:
+        return {str(it["clip_id"]): base64.b64decode(it["audio_data"], validate=True) for it in results}
+    except (TypeError, KeyError, ValueError) as e:
+        raise BatchUnavailable(f"unexpected response shape: {e!r}") from e
+
+async def _post_batch_with_backoff(session: aiohttp.ClientSession, items: List[Tuple[str, Dict[str, Any]]],
+                                   headers: Dict[str, str]) -> Dict[str, bytes]:
+    """post_batch, retrying 429s with backoff_delay (Retry-After wins); re-raises after MAX_ATTEMPTS."""
+    attempt = 0
+    while True:
+        try:
+            return await post_batch(session, items, headers)
+        except RateLimited as e:
+            attempt += 1
+            if attempt >= MAX_ATTEMPTS:
+                raise
+            await asyncio.sleep(backoff_delay(attempt - 1, e.retry_after))
+
+
+class Progress:
+    """Counts finished jobs (generated or failed) and logs one [OK] line per generated file."""
+
+    def __init__(self, jobs: List[Job]):
+        self.total = len(jobs)
+        self.done = 0
+        self.labels = {out_path: label for label, out_path, _ in jobs}
+
+    def ok(self, path: Path) -> None:
+        self.done += 1
+        log.info("[%04d/%04d] [OK] %s -> %s", self.done, self.total,
+                 self.labels.get(path, path.stem), path.name)
+
+    def failed(self, n: int = 1) -> None:
+        self.done += n
+
+
+async def generate_batched(jobs: List[Job], *, headers: Dict[str, str], batch_size: int,
+                           concurrency: int, cache_dir: Optional[Path] = None) -> Tuple[int, int]:
+    """
+    Submits uncached requests in groups of batch_size to the batch endpoint (one TLS/auth
+    round trip per group), demultiplexing the audio by clip_id. A rate-limited batch is
+    retried with backoff; if it stays limited, batching stops. Anything not delivered
+    (endpoint missing or rate limited, failed batch, missing clip) goes through generate_all().
+    Returns (generated, failed).
+    """
+    progress = Progress(jobs)
+    if cache_dir is not None:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+
+    targets: Dict[str, List[Path]] = {}
+    pending: List[Tuple[str, Dict[str, Any]]] = []
+    for _, out_path, payload in jobs:
+        key = payload_hash(payload)
+        if key not in targets:
+            targets[key] = []
+            if cache_dir is None or not (cache_dir / f"{key}{out_path.suffix}").exists():
+                pending.append((key, payload))
+        targets[key].append(out_path)
+
+    generated = 0
+    failed = 0
+    done: set = set()
+    async with make_session(1) as session:
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            try:
+                audios = await _post_batch_with_backoff(session, chunk, headers)
+            except BatchUnavailable:
+                log.info("[INFO] Batch endpoint unavailable; using per-clip requests")
+                break
+            except RateLimited as e:
+                # Still limited after backing off: stop batching; the per-clip path
+                # below paces itself, instead of firing every remaining chunk now.
+                print(f"[ERR] Batch endpoint still rate limited ({e}); using per-clip requests",
+                      file=sys.stderr)
+                break
+            except Exception as e:
+                print(f"[ERR] Batch of {len(chunk)} failed ({e}); retrying per clip", file=sys.stderr)
+                continue
+            for key, _ in chunk:
+                audio = audios.get(key)
+                if audio is None:
+                    continue
+                paths = targets[key]
+                src = cache_dir / f"{key}{paths[0].suffix}" if cache_dir is not None else paths[0]
+                try:
+                    write_bytes_atomic(src, audio)
+                    for dst in paths:
+                        if dst != src:
+                            link_or_copy(src, dst)
+                    generated += len(paths)
+                    done.add(key)
+                    for dst in paths:
+                        progress.ok(dst)
+                except OSError as e:
+                    print(f"[ERR] Failed to write {paths[0].name}: {e}", file=sys.stderr)
+
+    rest = [job for job in jobs if payload_hash(job[2]) not in done]
+    if rest:
+        ok, bad = await generate_all(rest, headers=headers, concurrency=concurrency,
+                                     cache_dir=cache_dir, progress=progress)
+        generated += ok
+        failed += bad
+    return generated, failed
+
+
+async def generate_all(jobs: List[Job], *, headers: Dict[str, str],
+                       concurrency: int, cache_dir: Optional[Path] = None,
+                       progress: Optional[Progress] = None) -> Tuple[int, int]:
+    """
+    Synthesizes every job with `concurrency` queue workers, streaming each result to disk.
+    With cache_dir, audio is stored as <cache_dir>/<payload_hash><ext> and hardlinked
+    into place; cached payloads are never re-requested.
+    Logs one line per finished job through `progress` (a fresh Progress if not given).
+    Returns (generated, failed).
+    """
+    if progress is None:
+        progress = Progress(jobs)
+    concurrency = max(1, concurrency)
+    in_flight = asyncio.Semaphore(concurrency)
+    # Queue entries: (job, payload_hash, attempt, requeues); the hash is computed once per job
+    queue: "asyncio.Queue[Tuple[Job, str, int, int]]" = asyncio.Queue()
+    if cache_dir is not None:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+
+    # Group output paths by request; each distinct request is synthesized at most once.
+    targets: Dict[str, List[Path]] = {}
+    first_jobs: Dict[str, Job] = {}
+    for job in jobs:
+        key = payload_hash(job[2])
+        if key not in targets:
+            targets[key] = []
+            first_jobs[key] = job
+        targets[key].append(job[1])
+
+    generated = 0
+    failed = 0
+
+    def source_path(key: str) -> Path:
+        first = targets[key][0]
+        return cache_dir / f"{key}{first.suffix}" if cache_dir is not None else first
+
+    def link_targets(key: str, src: Path) -> List[Path]:
+        """Links src to every output path of `key`; returns the paths now in place."""
+        linked = []
+        for dst in targets[key]:
+            if dst == src:
+                linked.append(dst)
+                continue
+            try:
+                link_or_copy(src, dst)
+                linked.append(dst)
+            except OSError as e:
+                print(f"[ERR] Failed to link {dst.name}: {e}", file=sys.stderr)
+        return linked
+
+    def finish(key: str, linked: List[Path]) -> None:
+        nonlocal generated, failed
+        for dst in linked:
+            progress.ok(dst)
+        bad = len(targets[key]) - len(linked)
+        progress.failed(bad)
+        generated += len(linked)
+        failed += bad
+
+    def fail(key: str) -> None:
+        nonlocal failed
+        progress.failed(len(targets[key]))
+        failed += len(targets[key])
+
+    cache_hits = 0
+    for key, job in first_jobs.items():
+        src = source_path(key)
+        if cache_dir is not None and src.exists():
+            cache_hits += 1
+            finish(key, link_targets(key, src))
+        else:
+            queue.put_nowait((job, key, 0, 0))
+
+    n_dups = len(jobs) - len(targets)
+    if n_dups:
+        log.info("[INFO] %d duplicate clip(s) will be linked instead of re-synthesized", n_dups)
+    if cache_hits:
+        log.info("[INFO] %d request(s) served from cache: %s", cache_hits, cache_dir)
+    if not queue.empty():
+        async with make_session(concurrency) as session:
+
+            async def worker() -> None:
+                while True:
+                    job, key, attempt, requeues = await queue.get()
+                    label, _, payload = job
+                    try:
+                        src = source_path(key)
+                        await stream_tts_to_file(session, in_flight, payload, headers, src)
+                        # Links/copies are blocking filesystem calls (a copy across
+                        # filesystems can be slow): keep them off the event loop.
+                        finish(key, await asyncio.to_thread(link_targets, key, src))
+                    except (RetryableError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                        retry_after = getattr(e, "retry_after", None)
+                        if isinstance(e, RateLimited) and e.concurrent and retry_after is None:
+                            # Plan concurrency exceeded (possibly by another process sharing
+                            # the quota): retry shortly, but not forever.
+                            if requeues + 1 >= MAX_REQUEUES:
+                                fail(key)
+                                print(f"[ERR] Failed {label}: {e!r} (still over the plan's concurrency "
+                                      f"after {MAX_REQUEUES} tries)", file=sys.stderr)
+                            else:
+                                await asyncio.sleep(REQUEUE_DELAY * (1 + random.random()))
+                                queue.put_nowait((job, key, attempt, requeues + 1))
+                        elif attempt + 1 < MAX_ATTEMPTS:
+                            await asyncio.sleep(backoff_delay(attempt, retry_after))
+                            queue.put_nowait((job, key, attempt + 1, requeues))
+                        else:
+                            fail(key)
+                            print(f"[ERR] Failed {label}: {e!r} (after {MAX_ATTEMPTS} attempts)", file=sys.stderr)
+                    except Exception as e:
+                        fail(key)
+                        print(f"[ERR] Failed {label}: {e}", file=sys.stderr)
+                    finally:
+                        queue.task_done()
+
+            workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, queue.qsize()))]
+            try:
+                await queue.join()
+            finally:
+                for w in workers:
+                    w.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+    # Persist the renames/links: once per touched directory, not per clip.
+    dirs = {p.parent for paths in targets.values() for p in paths}
+    if cache_dir is not None:
+        dirs.add(cache_dir)
+    for d in dirs:
+        fsync_dir(d)
+
+    return generated, failed
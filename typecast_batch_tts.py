@@ -13,75 +13,125 @@ Docs:
 from __future__ import annotations
 
 import argparse
+import functools
 import hashlib
+import json
+import logging
 import os
 import re
+import shutil
 import sys
+import threading
+import uuid
+from collections import ChainMap
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
 
 try:
     import yaml  # PyYAML
 except ImportError as e:
     raise SystemExit("Missing dependency: pyyaml. Install with: pip install pyyaml") from e
 
+# libyaml (C) scanner when PyYAML was built with it
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+from yaml.composer import Composer
+from yaml.events import (
+    DocumentStartEvent,
+    MappingEndEvent,
+    MappingStartEvent,
+    SequenceEndEvent,
+    SequenceStartEvent,
+)
+
+from requests.adapters import HTTPAdapter
 from typecast.client import Typecast
 from typecast.models import TTSRequest, Output, Prompt, LanguageCode
 
+try:  # streaming endpoint support landed later in the SDK
+    from typecast.models import TTSRequestStream
+except ImportError:
+    TTSRequestStream = None
+
+log = logging.getLogger("tts")
+
 
 SAFE_CHARS = re.compile(r"[^a-zA-Z0-9._-]+")
+# ASCII fast path for slugify: lowercase A-Z and map every other unsafe byte
+# to NUL in a single translate() pass; NUL runs then become one "-".
+_SLUG_ALLOWED = "abcdefghijklmnopqrstuvwxyz0123456789._-"
+_SLUG_TABLE = {i: "\0" for i in range(128) if chr(i) not in _SLUG_ALLOWED}
+_SLUG_TABLE.update({ord(c.upper()): c for c in "abcdefghijklmnopqrstuvwxyz"})
+
+DEFAULT_CACHE_DIR = Path("~/.cache/typecast_batch")
+STREAM_CHUNK_SIZE = 1 << 16
 
 
 def slugify(s: str, max_len: int = 80) -> str:
-    s = s.strip().lower()
-    s = SAFE_CHARS.sub("-", s).strip("-")
+    s = s.strip()
+    if s.isascii():
+        s = "-".join(filter(None, s.translate(_SLUG_TABLE).split("\0"))).strip("-")
+    else:
+        s = SAFE_CHARS.sub("-", s.lower()).strip("-")
     return s[:max_len] if len(s) > max_len else s
 
 
-def short_hash(s: str, n: int = 8) -> str:
-    return hashlib.sha1(s.encode("utf-8")).hexdigest()[:n]
+def text_digest(s: str) -> bytes:
+    """128-bit BLAKE2b of a line's text; computed once per line and reused for filename and cache key."""
+    return hashlib.blake2b(s.encode("utf-8"), digest_size=16).digest()
+
+
+def short_hash(digest: bytes, n: int = 8) -> str:
+    return digest.hex()[:n]
 
 
 def ensure_dir(p: Path) -> None:
     p.mkdir(parents=True, exist_ok=True)
 
 
+_LANGUAGE_ALIASES = {
+    "en": LanguageCode.ENG,
+    "en-us": LanguageCode.ENG,
+    "en-gb": LanguageCode.ENG,
+    "ko": LanguageCode.KOR,
+    "ko-kr": LanguageCode.KOR,
+    "ja": LanguageCode.JPN,
+    "ja-jp": LanguageCode.JPN,
+    "zh": LanguageCode.ZHO,
+    "zh-cn": LanguageCode.ZHO,
+    "es": LanguageCode.SPA,
+    "fr": LanguageCode.FRA,
+    "de": LanguageCode.DEU,
+}
+_LC_MEMBERS = LanguageCode.__members__
+
+
+@functools.lru_cache(maxsize=64)
 def as_language_code(code: str) -> LanguageCode:
     """
     Map common BCP-47-ish codes to SDK LanguageCode enums.
     The SDK exposes LanguageCode.* (e.g., ENG, KOR, JPN).
+    Memoized: a manifest typically repeats a handful of codes across every line.
     """
     c = code.strip().lower()
-    mapping = {
-        "en": LanguageCode.ENG,
-        "en-us": LanguageCode.ENG,
-        "en-gb": LanguageCode.ENG,
-        "ko": LanguageCode.KOR,
-        "ko-kr": LanguageCode.KOR,
-        "ja": LanguageCode.JPN,
-        "ja-jp": LanguageCode.JPN,
-        "zh": LanguageCode.ZHO,
-        "zh-cn": LanguageCode.ZHO,
-        "es": LanguageCode.SPA,
-        "fr": LanguageCode.FRA,
-        "de": LanguageCode.DEU,
-    }
-    if c in mapping:
-        return mapping[c]
+    if c in _LANGUAGE_ALIASES:
+        return _LANGUAGE_ALIASES[c]
     # best-effort: try direct enum name
     try:
-        return getattr(LanguageCode, c.upper().replace("-", "_"))
-    except Exception:
-        raise ValueError(f"Unsupported/unknown language code: {code}. Please map it in as_language_code().")
+        return _LC_MEMBERS[c.upper().replace("-", "_")]
+    except KeyError:
+        raise ValueError(f"Unsupported/unknown language code: {code}. Please map it in as_language_code().") from None
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class LineItem:
     set: str
     key: str
     text: str
+    text_digest: bytes
     filename: str
+    dest: Path
     model: str
     voice_id: str
     language: str
@@ -90,93 +140,398 @@ class LineItem:
     output: Dict[str, Any]
 
 
-def load_manifest(path: Path) -> Tuple[Dict[str, Any], List[LineItem]]:
-    data = yaml.safe_load(path.read_text(encoding="utf-8"))
-    if not isinstance(data, dict):
-        raise ValueError("Manifest root must be a YAML mapping/dict.")
-
-    defaults = data.get("defaults", {}) or {}
-    sets = data.get("sets", []) or []
-
-    items: List[LineItem] = []
-    for s in sets:
-        set_name = s.get("name")
-        if not set_name:
-            raise ValueError("Each set must have a name.")
-        set_defaults = {**defaults, **(s.get("defaults") or {})}
-        lines = s.get("lines", []) or []
-        for ln in lines:
-            key = ln.get("key")
-            text = ln.get("text")
-            if not key or not text:
-                raise ValueError(f"Line in set '{set_name}' must include key and text.")
-            # Effective params
-            model = ln.get("model", set_defaults.get("model"))
-            voice_id = ln.get("voice_id", set_defaults.get("voice_id"))
-            language = ln.get("language", set_defaults.get("language", "en"))
-            output_format = ln.get("output_format", set_defaults.get("output_format", "mp3"))
-
-            if not model or not voice_id:
-                raise ValueError(
-                    f"Missing model/voice_id for set '{set_name}', line '{key}'. "
-                    f"Provide in defaults or per-line."
-                )
-
-            prompt_cfg = {**(set_defaults.get("prompt") or {}), **(ln.get("prompt") or {})}
-            output_cfg = {**(set_defaults.get("output") or {}), **(ln.get("output") or {})}
-
-            # filename: use provided or derive from set/key
-            if ln.get("filename"):
-                filename = ln["filename"]
-            else:
-                base = f"{set_name}-{key}"
-                filename = f"{slugify(base)}-{short_hash(text)}.{output_format}"
-
-            items.append(
-                LineItem(
-                    set=set_name,
-                    key=key,
-                    text=text,
-                    filename=filename,
-                    model=model,
-                    voice_id=voice_id,
-                    language=language,
-                    output_format=output_format,
-                    prompt=prompt_cfg,
-                    output=output_cfg,
-                )
-            )
-
-    return data, items
+class _ManifestLoader(SafeLoader, Composer):
+    """
+    SafeLoader (libyaml when available) plus the Python Composer, so the manifest
+    can be walked event by event while each value is still composed and
+    constructed by PyYAML. CParser itself only composes whole documents.
+    """
+
+    def __init__(self, stream: BinaryIO) -> None:
+        SafeLoader.__init__(self, stream)
+        self.anchors = {}
+
+
+def _next_value(loader: _ManifestLoader) -> Any:
+    """Compose and construct the next node, without keeping it around afterwards."""
+    node = loader.compose_node(None, None)
+    try:
+        return loader.construct_object(node, deep=True)
+    finally:
+        loader.constructed_objects = {}
+        loader.recursive_objects = {}
+
+
+def _set_context(s: Dict[str, Any], defaults: Mapping[str, Any]) -> Tuple[str, Mapping[str, Any]]:
+    set_name = s.get("name")
+    if not set_name:
+        raise ValueError("Each set must have a name.")
+    return set_name, ChainMap(s.get("defaults") or {}, defaults)
+
+
+def _overlay(base: Optional[Dict[str, Any]], override: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Shallow merge that only allocates when both layers have keys; items never mutate these."""
+    if not override:
+        return base or {}
+    if not base:
+        return override
+    return {**base, **override}
+
+
+def _build_line_item(set_name: str, set_defaults: Mapping[str, Any], ln: Dict[str, Any], out_dir: Path) -> LineItem:
+    key = ln.get("key")
+    text = ln.get("text")
+    if not key or not text:
+        raise ValueError(f"Line in set '{set_name}' must include key and text.")
+    if not isinstance(text, str):
+        raise ValueError(f"Line '{key}' in set '{set_name}' must have string text (quote it in YAML).")
+    # Effective params: line -> set defaults -> manifest defaults, without copying any layer
+    effective = ChainMap(ln, set_defaults)
+    model = effective.get("model")
+    voice_id = effective.get("voice_id")
+    language = effective.get("language", "en")
+    output_format = effective.get("output_format", "mp3")
+
+    if not model or not voice_id:
+        raise ValueError(
+            f"Missing model/voice_id for set '{set_name}', line '{key}'. "
+            f"Provide in defaults or per-line."
+        )
+
+    prompt_cfg = _overlay(set_defaults.get("prompt"), ln.get("prompt"))
+    output_cfg = _overlay(set_defaults.get("output"), ln.get("output"))
+
+    digest = text_digest(text)
+
+    # filename: use provided or derive from set/key
+    if ln.get("filename"):
+        filename = ln["filename"]
+    else:
+        base = f"{set_name}-{key}"
+        filename = f"{slugify(base)}-{short_hash(digest)}.{output_format}"
+
+    return LineItem(
+        set=set_name,
+        key=key,
+        text=text,
+        text_digest=digest,
+        filename=filename,
+        dest=out_dir / filename,
+        model=model,
+        voice_id=voice_id,
+        language=language,
+        output_format=output_format,
+        prompt=prompt_cfg,
+        output=output_cfg,
+    )
+
+
+def _set_items(s: Dict[str, Any], defaults: Mapping[str, Any], out_dir: Path) -> Iterator[LineItem]:
+    set_name, set_defaults = _set_context(s, defaults)
+    for ln in s.get("lines", []) or []:
+        yield _build_line_item(set_name, set_defaults, ln, out_dir)
+
+
+def _streamable(loader: _ManifestLoader, event_type: type) -> bool:
+    # Anchored nodes must be composed whole so later aliases can resolve them.
+    return loader.check_event(event_type) and loader.peek_event().anchor is None
+
+
+def _iter_set(loader: _ManifestLoader, defaults: Mapping[str, Any], out_dir: Path) -> Iterator[LineItem]:
+    if not _streamable(loader, MappingStartEvent):
+        yield from _set_items(_next_value(loader), defaults, out_dir)
+        return
+    loader.get_event()
+
+    s: Dict[str, Any] = {}
+    streamed = False
+    while not loader.check_event(MappingEndEvent):
+        key = _next_value(loader)
+        if streamed and key in ("name", "defaults"):
+            # YAML would let the later key win, but lines were already handed out.
+            raise ValueError(f"Set '{s['name']}': duplicate '{key}' key.")
+        if key == "lines" and s.get("name") and "defaults" in s and _streamable(loader, SequenceStartEvent):
+            # name and defaults are final: hand out lines as they are parsed.
+            set_name, set_defaults = _set_context(s, defaults)
+            loader.get_event()
+            while not loader.check_event(SequenceEndEvent):
+                yield _build_line_item(set_name, set_defaults, _next_value(loader), out_dir)
+            loader.get_event()
+            streamed = True
+        else:
+            s[key] = _next_value(loader)
+    loader.get_event()
+
+    if not streamed:
+        # A later key could still change name/defaults (or lines were anchored):
+        # build the set once its mapping is complete.
+        yield from _set_items(s, defaults, out_dir)
+
+
+def iter_manifest(path: Path, out_dir: Path) -> Iterator[LineItem]:
+    """
+    Yield LineItems while the manifest is still being parsed, so API calls can
+    start before a large manifest has been read to the end.
+    Lines are only streamed once everything they inherit is known: `sets` after
+    `defaults`, and within a set, `lines` after both `name` and `defaults`.
+    Otherwise the affected part is read whole before any of its lines is yielded.
+    """
+    # Binary stream in: libyaml detects and decodes the encoding itself.
+    with open(path, "rb") as f:
+        loader = _ManifestLoader(f)
+        try:
+            loader.get_event()  # StreamStart
+            if not loader.check_event(DocumentStartEvent):
+                raise ValueError("Manifest root must be a YAML mapping/dict.")
+            loader.get_event()
+            if not loader.check_event(MappingStartEvent):
+                raise ValueError("Manifest root must be a YAML mapping/dict.")
+            loader.get_event()
+
+            defaults: Optional[Dict[str, Any]] = None
+            pending_sets: Any = None
+            streamed = False
+            while not loader.check_event(MappingEndEvent):
+                key = _next_value(loader)
+                if key == "sets":
+                    if defaults is not None and _streamable(loader, SequenceStartEvent):
+                        streamed = True
+                        loader.get_event()
+                        while not loader.check_event(SequenceEndEvent):
+                            yield from _iter_set(loader, defaults, out_dir)
+                        loader.get_event()
+                    else:
+                        # defaults may still follow: hold the sets until the root closes.
+                        pending_sets = _next_value(loader)
+                elif key == "defaults":
+                    if streamed:
+                        raise ValueError("Manifest has a duplicate 'defaults' key.")
+                    defaults = _next_value(loader) or {}
+                else:
+                    _next_value(loader)
+
+            for s in pending_sets or []:
+                yield from _set_items(s, defaults or {}, out_dir)
+        finally:
+            loader.dispose()
+
+
+def cache_key(item: LineItem) -> str:
+    """Canonical hash of everything that affects the generated audio."""
+    blob = json.dumps(
+        {
+            "text": item.text_digest.hex(),
+            "model": item.model,
+            "voice_id": item.voice_id,
+            "language": item.language,
+            "prompt": item.prompt,
+            "output": item.output,
+            "fmt": item.output_format,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def link_or_copy(src: Path, dest: Path) -> None:
+    """Hardlink src to dest (replacing dest); fall back to a copy across filesystems."""
+    try:
+        if dest.samefile(src):
+            # rename() between two links to one inode is a no-op that would leave tmp behind.
+            return
+    except FileNotFoundError:
+        pass
+    tmp = dest.with_name(f".{dest.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dest)
+
+
+def write_blob(path: Path, data: bytes) -> None:
+    """
+    Write a whole response with raw os.write calls (no Python/libc buffering) into
+    a new file. Where posix_fadvise exists, flush the data and then tell the kernel
+    the pages won't be read back by this process; DONTNEED skips dirty pages, so
+    the fdatasync has to come first for the hint to free anything.
+    """
+    fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        if hasattr(os, "posix_fadvise"):
+            os.fdatasync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def can_stream(cli: Typecast, item: LineItem) -> bool:
+    """
+    The stream endpoint rejects `volume`, and its WAV header carries a placeholder
+    size, so only MP3 lines without an explicit volume are streamed to disk.
+    """
+    return (
+        TTSRequestStream is not None
+        and hasattr(cli, "text_to_speech_stream")
+        and item.output_format == "mp3"
+        and item.output.get("volume") is None
+    )
+
+
+def synthesize(cli: Typecast, item: LineItem, req: TTSRequest, cache_path: Optional[Path]) -> Any:
+    """
+    Generate one line into item.dest (via the cache when enabled) and return its duration
+    (None when unknown: the stream endpoint doesn't report one).
+    Audio is written to a temp file and renamed, so an interrupted run never leaves
+    a truncated file behind under the final name.
+    """
+    target = cache_path or item.dest
+    tmp = target.with_name(f".{target.name}.{uuid.uuid4().hex}.part")
+    try:
+        if can_stream(cli, item):
+            body = req.model_dump(exclude_none=True)
+            body["output"].pop("volume", None)
+            duration = None
+            with open(tmp, "wb", buffering=1 << 20) as f:
+                for chunk in cli.text_to_speech_stream(TTSRequestStream(**body), chunk_size=STREAM_CHUNK_SIZE):
+                    f.write(chunk)
+        else:
+            resp = cli.text_to_speech(req)
+            duration = getattr(resp, "duration", None)
+            write_blob(tmp, resp.audio_data)
+        os.replace(tmp, target)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    if cache_path is not None:
+        link_or_copy(cache_path, item.dest)
+    return duration
+
+
+class InFlight:
+    """
+    Per-run registry of request key -> Future resolving to the file holding that
+    audio. The first line with a given key generates it; identical lines wait
+    for that result and link it instead of issuing the same API call again.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._futures: Dict[str, Future] = {}
+
+    def claim(self, key: str) -> Tuple[Future, bool]:
+        """Return (future, owner); owner is True for the first caller of key."""
+        with self._lock:
+            fut = self._futures.get(key)
+            if fut is not None:
+                return fut, False
+            fut = self._futures[key] = Future()
+            return fut, True
+
+
+def process_line(cli: Typecast, item: LineItem, cache_dir: Optional[Path], in_flight: InFlight) -> Tuple[str, Any]:
+    """
+    Worker body for one line: dedup, cache lookup, request building and generation
+    all run on the pool so the manifest loop only parses and submits.
+    Returns (source, duration) with source one of "generated", "cached", "duplicate".
+    """
+    key = cache_key(item)
+    fut, owner = in_flight.claim(key)
+    if not owner:
+        link_or_copy(fut.result(), item.dest)
+        return "duplicate", None
+
+    try:
+        cache_path = None
+        if cache_dir is not None:
+            cache_path = cache_dir / f"{key}.{item.output_format}"
+            if cache_path.exists():
+                link_or_copy(cache_path, item.dest)
+                fut.set_result(cache_path)
+                return "cached", None
+        duration = synthesize(cli, item, build_tts_request(item), cache_path)
+        fut.set_result(cache_path or item.dest)
+        return "generated", duration
+    except BaseException as e:
+        fut.set_exception(e)
+        raise
+
+
+@functools.lru_cache(maxsize=256)
+def _prompt(known: Tuple[Tuple[str, Any], ...]) -> Prompt:
+    return Prompt(**dict(known))
+
+
+@functools.lru_cache(maxsize=256)
+def _output(output_kwargs: Tuple[Tuple[str, Any], ...]) -> Output:
+    return Output(**dict(output_kwargs))
+
+
+@functools.lru_cache(maxsize=256)
+def _request_builder(
+    model: str,
+    voice_id: str,
+    language: str,
+    known: Tuple[Tuple[str, Any], ...],
+    output_kwargs: Tuple[Tuple[str, Any], ...],
+) -> Callable[[str], TTSRequest]:
+    """
+    Specialize request building for one parameter group: validate a prototype
+    request once, then each line only swaps in its text (no revalidation).
+    """
+    proto = TTSRequest(
+        text=".",
+        model=model,
+        voice_id=voice_id,
+        language=as_language_code(language),
+        prompt=_prompt(known) if known else None,
+        output=_output(output_kwargs),
+    )
+
+    def build(text: str) -> TTSRequest:
+        return proto.model_copy(update={"text": text})
+
+    return build
 
 
 def build_tts_request(item: LineItem) -> TTSRequest:
-    prompt = None
+    # Lines typically share a few prompt/output combinations, so the validated
+    # Prompt/Output models are memoized per params tuple and shared (never mutated).
+    known: List[Tuple[str, Any]] = []
     if item.prompt:
         # Typecast prompt uses emotion_preset / emotion_intensity per docs.
         # We pass through only known keys to avoid SDK errors if you add extras.
-        known = {}
         if "emotion_preset" in item.prompt:
-            known["emotion_preset"] = item.prompt["emotion_preset"]
+            known.append(("emotion_preset", item.prompt["emotion_preset"]))
         if "emotion_intensity" in item.prompt:
-            known["emotion_intensity"] = float(item.prompt["emotion_intensity"])
-        if known:
-            prompt = Prompt(**known)
+            known.append(("emotion_intensity", float(item.prompt["emotion_intensity"])))
 
-    output_kwargs: Dict[str, Any] = {"audio_format": item.output_format}
+    output_kwargs = [("audio_format", item.output_format)]
     # Optional audio controls (ranges per docs; validate lightly)
     for k in ("volume", "pitch", "tempo"):
         if k in item.output and item.output[k] is not None:
-            output_kwargs[k] = item.output[k]
-
-    return TTSRequest(
-        text=item.text,
-        model=item.model,
-        voice_id=item.voice_id,
-        language=as_language_code(item.language),
-        prompt=prompt,
-        output=Output(**output_kwargs),
-    )
+            output_kwargs.append((k, item.output[k]))
+
+    # Every line of a group shares everything but the text.
+    return _request_builder(item.model, item.voice_id, item.language, tuple(known), tuple(output_kwargs))(item.text)
+
+
+def size_connection_pool(cli: Typecast, size: int) -> None:
+    """
+    Give the SDK's requests.Session a keep-alive pool with one slot per worker.
+    The default adapter keeps 10 connections, so with more workers the extras are
+    discarded after each call and every request past that pays a new TLS handshake.
+    """
+    session = getattr(cli, "session", None)
+    if session is None or not hasattr(session, "mount"):
+        return
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, size))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
 
 
 def main() -> int:
@@ -185,15 +540,31 @@ def main() -> int:
     ap.add_argument("--out", type=str, default="out_audio", help="Output directory.")
     ap.add_argument("--dry-run", action="store_true", help="Print planned outputs without calling API.")
     ap.add_argument("--overwrite", action="store_true", help="Overwrite existing files.")
+    ap.add_argument(
+        "--cache-dir",
+        type=str,
+        default=str(DEFAULT_CACHE_DIR),
+        help=f"Content cache for generated audio (default: {DEFAULT_CACHE_DIR}).",
+    )
+    ap.add_argument("--no-cache", action="store_true", help="Always call the API; don't read or write the cache.")
+    ap.add_argument("--concurrency", type=int, default=8, help="Max parallel API requests (default: 8).")
+    ap.add_argument("--quiet", action="store_true", help="Only print errors and the final summary.")
     ap.add_argument("--list-voices", action="store_true", help="List available voices (requires API key).")
     ap.add_argument("--model", type=str, default=None, help="Filter voices by model when listing (optional).")
     args = ap.parse_args()
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO, format="%(message)s", stream=sys.stdout)
 
     manifest_path = Path(args.manifest).expanduser().resolve()
     out_dir = Path(args.out).expanduser().resolve()
     ensure_dir(out_dir)
 
+    cache_dir: Optional[Path] = None
+    if not args.no_cache:
+        cache_dir = Path(args.cache_dir).expanduser().resolve()
+        ensure_dir(cache_dir)
+
     cli = Typecast()  # uses TYPECAST_API_KEY env var by default per docs
+    size_connection_pool(cli, args.concurrency)
 
     if args.list_voices:
         # Voice discovery feature exists in docs; method name may vary by SDK version.
@@ -218,33 +589,72 @@ def main() -> int:
             print(f"{vid}\t{model}\t{name}\t{lang}")
         return 0
 
-    _, items = load_manifest(manifest_path)
-
     planned = 0
     generated = 0
     skipped = 0
+    cached = 0
+    deduped = 0
+    failed = 0
+
+    # One directory read instead of a stat() per line; manifest filenames that
+    # point into subdirectories fall back to an exists() check.
+    existing = set() if args.overwrite else {e.name for e in os.scandir(out_dir)}
+
+    # Each call is network-bound and independent, so fan out over a bounded pool.
+    # Lines are submitted as the manifest is parsed; everything after the skip
+    # check runs in the workers, and counters are only touched from this thread.
+    in_flight = InFlight()
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        futures: Dict[Future, LineItem] = {}
+        try:
+            for item in iter_manifest(manifest_path, out_dir):
+                planned += 1
+                name = item.filename
+
+                if not args.overwrite:
+                    if (name in existing) if os.path.basename(name) == name else item.dest.exists():
+                        skipped += 1
+                        continue
+
+                if args.dry_run:
+                    log.info("[DRY] %s/%s -> %s", item.set, item.key, item.dest.name)
+                    continue
+
+                futures[pool.submit(process_line, cli, item, cache_dir, in_flight)] = item
+        except BaseException:
+            # A bad line further down the manifest: don't start any more requests.
+            for fut in futures:
+                fut.cancel()
+            raise
+
+        for fut in as_completed(futures):
+            item = futures[fut]
+            try:
+                source, duration = fut.result()
+            except Exception as e:
+                failed += 1
+                print(f"[ERR] {item.set}/{item.key}: {e}", file=sys.stderr)
+                continue
+
+            if source == "cached":
+                cached += 1
+                log.info("[CACHE] %s/%s -> %s", item.set, item.key, item.dest.name)
+                continue
+            if source == "duplicate":
+                deduped += 1
+                log.info("[DUP] %s/%s -> %s", item.set, item.key, item.dest.name)
+                continue
+            generated += 1
+            if duration is None:
+                log.info("[OK] %s/%s -> %s", item.set, item.key, item.dest.name)
+            else:
+                log.info("[OK] %s/%s -> %s (%ss)", item.set, item.key, item.dest.name, duration)
 
-    for item in items:
-        dest = out_dir / item.filename
-        planned += 1
-
-        if dest.exists() and not args.overwrite:
-            skipped += 1
-            continue
-
-        if args.dry_run:
-            print(f"[DRY] {item.set}/{item.key} -> {dest.name}")
-            continue
-
-        req = build_tts_request(item)
-        resp = cli.text_to_speech(req)
-
-        dest.write_bytes(resp.audio_data)
-        generated += 1
-        print(f"[OK] {item.set}/{item.key} -> {dest.name} ({getattr(resp, 'duration', '?')}s)")
-
-    print(f"\nPlanned: {planned}, Generated: {generated}, Skipped(existing): {skipped}")
-    return 0
+    print(
+        f"\nPlanned: {planned}, Generated: {generated}, Skipped(existing): {skipped}, "
+        f"Cached: {cached}, Deduped: {deduped}, Failed: {failed}"
+    )
+    return 1 if failed else 0
 
 
 if __name__ == "__main__":